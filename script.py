@@ -1,49 +1,316 @@
+import io
 import os
-from tkinter import Tk, simpledialog
-from tkinter.filedialog import askopenfilename
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import Tk, simpledialog, messagebox
+from tkinter.filedialog import askopenfilename, askdirectory
 from PIL import Image
 
-def image_compressor(file_path, quality):
+try:
+    import oxipng  # pyoxipng: multithreaded PNG optimizer
+except ImportError:
+    oxipng = None
+
+try:
+    # PyTurboJPEG: direct libjpeg-turbo calls for the plain JPEG-to-JPEG case
+    from turbojpeg import TurboJPEG, TJFLAG_PROGRESSIVE, TJPF_RGB, TJSAMP_420
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    # Not installed, or the libturbojpeg shared library could not be found
+    turbo_jpeg = None
+
+try:
+    # AVIF support for Pillow versions without a built-in AVIF plugin
+    from pillow_heif import register_avif_opener
+    register_avif_opener()
+except ImportError:
+    pass
+
+# File extension -> Pillow format name
+SUPPORTED_FORMATS = {
+    '.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.tiff': 'TIFF', '.bmp': 'BMP',
+    '.webp': 'WEBP', '.avif': 'AVIF',
+}
+# Output format choice -> file extension
+OUTPUT_FORMATS = {'jpeg': '.jpg', 'png': '.png', 'webp': '.webp', 'avif': '.avif'}
+JPEG_FORMATS = frozenset({'.jpg', '.jpeg'})
+# Re-encoding a JPEG at this quality or above without resizing rarely makes it smaller
+KEEP_ORIGINAL_QUALITY = 90
+# Highest quality the encoders accept; libjpeg clamps, libwebp and libavif reject
+MAX_QUALITY = 100
+JPEGTRAN = shutil.which('jpegtran')
+# TIFF tags describing how the source pixels were stored; copied into the
+# output they would describe the wrong file (and break TIFF output)
+IMAGE_LAYOUT_TAGS = frozenset({
+    254, 255, 256, 257, 258, 259, 262, 266, 273, 277, 278, 279, 284, 317, 320,
+    322, 323, 324, 325, 338, 339, 513, 514, 530, 531, 34675,
+})
+# XMP, IPTC and Photoshop TIFF tags
+TIFF_METADATA_TAGS = (700, 33723, 34377)
+
+def save_options(ext, quality, optimize):
+    quality = min(quality, MAX_QUALITY)
+    # JPEG: the optimize pass re-runs Huffman coding, so only do it (and
+    # progressive encoding) when asked for
+    if ext in JPEG_FORMATS:
+        return {'quality': quality, 'optimize': optimize, 'progressive': optimize, 'subsampling': 2}
+    # PNG: zlib level 6 is the default speed/size tradeoff, 9 is much slower
+    if ext == '.png':
+        return {'compress_level': 9 if optimize else 6}
+    # WebP: method trades encode speed for size, 4 is libwebp's default
+    if ext == '.webp':
+        return {'quality': quality, 'method': 6 if optimize else 4}
+    return {'quality': quality}
+
+def metadata_options(img, keep_metadata):
+    # EXIF, XMP and color profile only cost bytes on a compressed image, so they are
+    # dropped unless asked for; PNG would otherwise carry the profile over
+    if not keep_metadata:
+        # Pillow's TIFF writer copies XMP, IPTC and Photoshop tags from the
+        # source no matter what save() is given
+        if hasattr(img, 'tag_v2'):
+            for tag in TIFF_METADATA_TAGS:
+                img.tag_v2.pop(tag, None)
+        return {'icc_profile': None, 'xmp': b''}
+
+    # An Exif object is serialized the right way for each output format, unlike
+    # the raw img.info['exif'] bytes, and also picks up TIFF tags
+    options = {}
+    exif = img.getexif()
+    for tag in IMAGE_LAYOUT_TAGS & exif.keys():
+        del exif[tag]
+    if exif:
+        options['exif'] = exif
+    for key in ('icc_profile', 'xmp'):
+        if img.info.get(key):
+            options[key] = img.info[key]
+    return options
+
+def convert_for_format(img, ext):
+    # 16-bit grayscale would be clipped, not scaled, on the way down to 8 bits
+    if ext in JPEG_FORMATS | {'.webp', '.avif'} and img.mode.startswith('I'):
+        img = img.convert('I').point(lambda v: v / 256).convert('L')
+    # JPEG has no alpha channel, so flatten transparent images onto white
+    if ext in JPEG_FORMATS and img.mode not in ('RGB', 'L', 'CMYK'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    # PNG and WebP cannot store CMYK
+    if ext in ('.png', '.webp') and img.mode == 'CMYK':
+        return img.convert('RGB')
+    return img
+
+def fit_size(size, max_width, max_height):
+    # One scale factor for both sides keeps the aspect ratio exact; never enlarge
+    width, height = size
+    ratio = min(
+        max_width / width if max_width else 1.0,
+        max_height / height if max_height else 1.0,
+        1.0,
+    )
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+def write_file(output_path, data):
+    # Hand the whole encoded image to the OS at once instead of letting the
+    # encoder write it out in small chunks
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def save_image(img, output_path, file_ext, quality, optimize, metadata):
+    buffer = io.BytesIO()
+
+    # oxipng picks filters and deflates on every core, so let Pillow write a
+    # fast, barely compressed PNG and leave the real work to it
+    if file_ext == '.png' and oxipng is not None:
+        img.save(buffer, 'PNG', compress_level=1, **metadata)
+        strip = oxipng.StripChunks.none() if any(metadata.values()) else oxipng.StripChunks.safe()
+        data = oxipng.optimize_from_memory(buffer.getvalue(), level=4 if optimize else 2, strip=strip)
+    else:
+        img.save(buffer, SUPPORTED_FORMATS[file_ext], **save_options(file_ext, quality, optimize), **metadata)
+        data = buffer.getbuffer()
+
+    write_file(output_path, data)
+
+def turbo_jpeg_recompress(file_path, output_path, quality, optimize):
+    # Decode and re-encode entirely inside libjpeg-turbo, skipping Pillow's
+    # mode handling and encoder setup
+    with open(file_path, 'rb') as f:
+        pixels = turbo_jpeg.decode(f.read(), pixel_format=TJPF_RGB)
+    data = turbo_jpeg.encode(pixels, quality=min(quality, MAX_QUALITY), pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420,
+                             flags=TJFLAG_PROGRESSIVE if optimize else 0)
+    write_file(output_path, data)
+
+def lossless_jpeg_copy(file_path, output_path, optimize, keep_metadata):
+    # jpegtran rebuilds the Huffman tables without touching the DCT data, so
+    # there is no generation loss; returns False if the caller has to re-encode
+    if JPEGTRAN:
+        command = [JPEGTRAN, '-optimize', '-copy', 'all' if keep_metadata else 'none']
+        if optimize:
+            command.append('-progressive')
+        command += ['-outfile', output_path, file_path]
+        if subprocess.run(command, capture_output=True).returncode == 0:
+            return True
+
+    # A plain copy would keep the metadata, so only when that is wanted
+    if not keep_metadata:
+        return False
+
+    # copyfile() copies in the kernel; a hard link would let later writes to
+    # the output overwrite the original
+    shutil.copyfile(file_path, output_path)
+    return True
+
+def image_compressor(file_path, quality, optimize=False, max_width=None, max_height=None,
+                     output_format=None, keep_metadata=False):
     try:
         # Verify file type
-        if file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.tiff', '.bmp')):
-            with Image.open(file_path) as img:
-                # Output file path
-                base, ext = os.path.splitext(file_path)
+        base, ext = os.path.splitext(file_path)
+        file_ext = ext.lower()
+        if file_ext in SUPPORTED_FORMATS:
+            # Output file path, keeping the input format unless asked otherwise.
+            # On conversion the source extension stays in the name, so photo.jpg
+            # and photo.png don't both become photo_compressed.webp
+            output_ext = OUTPUT_FORMATS[output_format] if output_format else file_ext
+            if output_ext == file_ext:
                 output_path = f"{base}_compressed{ext}"
+            else:
+                output_path = f"{base}_{ext[1:]}_compressed{output_ext}"
 
-                # Save image with chosen quality
-                img.save(output_path, quality=quality, optimize=True)
+            # Nothing to gain from a decode/re-encode round trip
+            if (file_ext in JPEG_FORMATS and output_ext in JPEG_FORMATS
+                    and max_width is None and max_height is None
+                    and quality >= KEEP_ORIGINAL_QUALITY
+                    and lossless_jpeg_copy(file_path, output_path, optimize, keep_metadata)):
+                print(f"Image already compressed, saved losslessly as: {output_path}")
+                return
+
+            with Image.open(file_path) as img:
+                new_size = fit_size(img.size, max_width, max_height)
+                # Taken before any conversion, which can drop img.info
+                metadata = metadata_options(img, keep_metadata)
+
+                # The common RGB JPEG-to-JPEG case at the same size; TurboJPEG
+                # writes no metadata
+                if (turbo_jpeg is not None and file_ext in JPEG_FORMATS and output_ext in JPEG_FORMATS
+                        and new_size == img.size and img.mode == 'RGB' and not any(metadata.values())):
+                    turbo_jpeg_recompress(file_path, output_path, quality, optimize)
+                else:
+                    if new_size != img.size:
+                        # JPEG can decode straight at 1/2, 1/4 or 1/8 scale, which
+                        # skips most of the IDCT work before the final resize
+                        if file_ext in JPEG_FORMATS:
+                            img.draft(img.mode, new_size)
+                        # reducing_gap box-reduces by an integer factor first, so
+                        # LANCZOS only runs over at most 2x the target size
+                        img = img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+                    # Save image with chosen quality
+                    img = convert_for_format(img, output_ext)
+                    save_image(img, output_path, output_ext, quality, optimize, metadata)
 
             print(f"Image compressed and saved as: {output_path}")
         else:
-            print("Unsupported image format!")
+            print(f"Unsupported image format: {file_path}")
 
     except Exception as e:
-        print(f"Error compressing image: {e}")
+        print(f"Error compressing {file_path}: {e}")
+
+def folder_compressor(folder_path, quality, optimize=False, max_width=None, max_height=None,
+                      output_format=None, keep_metadata=False):
+    # Skip our own output so re-running on a folder doesn't compress it again;
+    # scandir() reads the file type from the listing without a stat() per entry
+    file_paths = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            base, ext = os.path.splitext(entry.name)
+            if (ext.lower() in SUPPORTED_FORMATS and not base.endswith('_compressed')
+                    and entry.is_file()):
+                file_paths.append(entry.path)
+    file_paths.sort()
+
+    if not file_paths:
+        print("No supported images found in folder!")
+        return
+
+    # Pillow releases the GIL while encoding, so threads scale across cores
+    # without pickling images between processes
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(lambda path: image_compressor(path, quality, optimize, max_width, max_height,
+                                                        output_format, keep_metadata),
+                          file_paths))
 
 if __name__ == "__main__":
     root = Tk()
     root.withdraw()  # Hide the main tkinter window
 
-    print("Select an image file to compress")
-    file_path = askopenfilename(
-        title="Select Image",
-        filetypes=[("Image files", "*.jpg *.jpeg *.png *.tiff *.bmp")]
-    )
+    # Either a single image or every image in a folder
+    folder_mode = messagebox.askyesno("Folder Mode", "Compress every image in a folder?")
+
+    if folder_mode:
+        print("Select a folder to compress")
+        file_path = askdirectory(title="Select Folder")
+    else:
+        print("Select an image file to compress")
+        file_path = askopenfilename(
+            title="Select Image",
+            filetypes=[("Image files", "*.jpg *.jpeg *.png *.tiff *.bmp *.webp *.avif")]
+        )
 
     if file_path:
         # Ask user for desired quality (1–100)
         quality = simpledialog.askinteger(
             "Compression Quality",
-            "Enter quality (1 = lowest, 500 = highest):",
+            "Enter quality (1 = lowest, 100 = highest):",
             minvalue=1,
-            maxvalue=500
+            maxvalue=MAX_QUALITY
         )
 
         if quality is not None:
-            image_compressor(file_path, quality)
+            # Extra optimization is slower for a few percent smaller files
+            optimize = messagebox.askyesno(
+                "Optimize",
+                "Run the extra optimization pass? (slower, slightly smaller files)"
+            )
+            # Optional size limits, Cancel keeps the original dimensions
+            max_width = simpledialog.askinteger(
+                "Maximum Width",
+                "Enter maximum width in pixels (Cancel = no limit):",
+                minvalue=1
+            )
+            max_height = simpledialog.askinteger(
+                "Maximum Height",
+                "Enter maximum height in pixels (Cancel = no limit):",
+                minvalue=1
+            )
+            # WebP and AVIF are usually much smaller than JPEG at the same quality
+            output_format = simpledialog.askstring(
+                "Output Format",
+                "Enter output format (jpeg, png, webp, avif), leave empty to keep the original:"
+            )
+            output_format = (output_format or '').strip().lower() or None
+
+            # Metadata is stripped unless the user wants to keep it
+            keep_metadata = messagebox.askyesno(
+                "Metadata",
+                "Keep metadata (EXIF, color profile)? (larger files)"
+            )
+
+            if output_format is not None and output_format not in OUTPUT_FORMATS:
+                print("Unsupported output format!")
+            elif folder_mode:
+                folder_compressor(file_path, quality, optimize, max_width, max_height, output_format,
+                                  keep_metadata)
+            else:
+                image_compressor(file_path, quality, optimize, max_width, max_height, output_format,
+                                 keep_metadata)
         else:
             print("Compression cancelled by user.")
     else:
-        print("No file selected.")
+        print("No file or folder selected.")